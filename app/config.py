@@ -42,6 +42,92 @@ class Config:
     VERA_PORT = int(vera_port_str) if vera_port_str.isdigit() else 3480
 
     VERA_EVENT_FILTER = os.getenv('VERA_EVENT_FILTER', '')
+
+    # Figyelt változók '#'-tel elválasztva: beépített név vagy 'Név=serviceId|Változó|flag/level/float/int'
+    # További beépítettek: Armed, Temperature, Humidity, BatteryLevel, Watts, KWH
+    VERA_WATCHED_VARIABLES = os.getenv('VERA_WATCHED_VARIABLES', 'Status#LoadLevelStatus#Tripped')
+
+    # MQTT export puffer: ennyi eseményt tart meg, amíg a broker nem érhető el
+    export_buffer_str = os.getenv('EXPORT_BUFFER_SIZE', '')
+    EXPORT_BUFFER_SIZE = int(export_buffer_str) if export_buffer_str.isdigit() else 500
+
+    # HTTP puffer sávonként: a vevő által el nem fogadott események, újraküldés HTTP_RETRY_INTERVAL mp-enként vagy IP változáskor
+    http_buffer_str = os.getenv('HTTP_BUFFER_SIZE', '')
+    HTTP_BUFFER_SIZE = int(http_buffer_str) if http_buffer_str.isdigit() else 500
+
+    http_retry_str = os.getenv('HTTP_RETRY_INTERVAL', '')
+    HTTP_RETRY_INTERVAL = int(http_retry_str) if http_retry_str.isdigit() else 5
+
+    # Ennyi sikertelen újraküldés után az eseményt eldobja, hogy ne tartsa fel a sávot
+    http_max_attempts_str = os.getenv('HTTP_MAX_ATTEMPTS', '')
+    HTTP_MAX_ATTEMPTS = int(http_max_attempts_str) if http_max_attempts_str.isdigit() else 10
+
+    # Vezérlési parancsok: '<VERA_CMD_TOPIC>/<room>/<device>', nyugta: '<VERA_CMD_ACK_TOPIC>/<room>/<device>'
+    VERA_CMD_TOPIC = os.getenv('VERA_CMD_TOPIC', 'vera/cmd')
+    VERA_CMD_ACK_TOPIC = os.getenv('VERA_CMD_ACK_TOPIC', 'vera/ack')
+
+    vera_cmd_coalesce_str = os.getenv('VERA_CMD_COALESCE_MS', '')
+    VERA_CMD_COALESCE_MS = int(vera_cmd_coalesce_str) if vera_cmd_coalesce_str.isdigit() else 300
+
+    # Forgalomrögzítés (üres = kikapcsolva), gzip JSON-lines fájl a soak_replay.py számára
+    VERA_CAPTURE_FILE = os.getenv('VERA_CAPTURE_FILE', '')
+
+    vera_capture_max_str = os.getenv('VERA_CAPTURE_MAX_MB', '')
+    VERA_CAPTURE_MAX_MB = int(vera_capture_max_str) if vera_capture_max_str.isdigit() else 200
+
+    # Naplózás: háttérszálas író, JSON formátum, méret alapú rotálás
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'json').lower()
+    LOG_FILE = os.getenv('LOG_FILE', 'vera_processor.log')
+
+    log_max_bytes_str = os.getenv('LOG_MAX_BYTES', '')
+    LOG_MAX_BYTES = int(log_max_bytes_str) if log_max_bytes_str.isdigit() else 5 * 1024 * 1024
+
+    log_backup_count_str = os.getenv('LOG_BACKUP_COUNT', '')
+    LOG_BACKUP_COUNT = int(log_backup_count_str) if log_backup_count_str.isdigit() else 3
+
+    # Kategóriánkénti (logger név) korlát ablakonként, pl. 'default=0,vera_http_event_handler=30' (0 = nincs korlát)
+    LOG_RATE_LIMITS = os.getenv('LOG_RATE_LIMITS', 'default=0,vera_http_event_handler=30,http_client=30')
+
+    log_rate_window_str = os.getenv('LOG_RATE_WINDOW', '')
+    LOG_RATE_WINDOW = int(log_rate_window_str) if log_rate_window_str.isdigit() else 10
+
+    # Hibakereső triggerek: '<DEBUG_TOPIC>/profile|memory|stacks', eredmény a DEBUG_DIR-ben és a DEBUG_REPLY_TOPIC-on
+    DEBUG_TOPIC = os.getenv('DEBUG_TOPIC', 'debug')
+    DEBUG_REPLY_TOPIC = os.getenv('DEBUG_REPLY_TOPIC', 'debug/reply')
+    DEBUG_DIR = os.getenv('DEBUG_DIR', 'debug_output')
+
+    # Profil max. hossza, és ennyi mp snapshot nélkül a tracemalloc magától leáll
+    debug_profile_max_str = os.getenv('DEBUG_PROFILE_MAX_SECONDS', '')
+    DEBUG_PROFILE_MAX_SECONDS = int(debug_profile_max_str) if debug_profile_max_str.isdigit() else 120
+
+    debug_sample_interval_str = os.getenv('DEBUG_SAMPLE_INTERVAL_MS', '')
+    DEBUG_SAMPLE_INTERVAL_MS = int(debug_sample_interval_str) if debug_sample_interval_str.isdigit() else 15
+
+    debug_tracemalloc_frames_str = os.getenv('DEBUG_TRACEMALLOC_FRAMES', '')
+    DEBUG_TRACEMALLOC_FRAMES = int(debug_tracemalloc_frames_str) if debug_tracemalloc_frames_str.isdigit() else 1
+
+    # Egészségügyi végpont (/live, /ready, /health); 0 = kikapcsolva
+    health_port_str = os.getenv('HEALTH_PORT', '')
+    HEALTH_PORT = int(health_port_str) if health_port_str.isdigit() else 8099
+
+    health_heartbeat_str = os.getenv('HEALTH_MAX_HEARTBEAT_AGE', '')
+    HEALTH_MAX_HEARTBEAT_AGE = int(health_heartbeat_str) if health_heartbeat_str.isdigit() else 20
+
+    health_poll_age_str = os.getenv('HEALTH_MAX_POLL_AGE', '')
+    HEALTH_MAX_POLL_AGE = int(health_poll_age_str) if health_poll_age_str.isdigit() else 30
+
+    health_backlog_str = os.getenv('HEALTH_MAX_BACKLOG', '')
+    HEALTH_MAX_BACKLOG = int(health_backlog_str) if health_backlog_str.isdigit() else 200
+
+    # Prioritási sávok: 'room:device[:variable]' minták '#'-tel elválasztva
+    VERA_PRIORITY_HIGH = os.getenv('VERA_PRIORITY_HIGH', 'Biztonság:DOOR*#Terasz:MOVE*#*:*:Tripped')
+    VERA_PRIORITY_LOW = os.getenv('VERA_PRIORITY_LOW', 'Szerver:HUMI*#Szerver:TEMP*#Áram:*')
+    # Sávonkénti párhuzamosság és késleltetési cél (ms), pl. 'high=2,normal=1,low=1'
+    VERA_LANE_WORKERS = os.getenv('VERA_LANE_WORKERS', 'high=2,normal=1,low=1')
+    VERA_LANE_LATENCY_MS = os.getenv('VERA_LANE_LATENCY_MS', 'high=500,normal=2000,low=10000')
+    # Sávonkénti (workerenkénti) sorhossz; megteltekor a legrégebbi esemény elvész
+    VERA_LANE_QUEUE_SIZE = os.getenv('VERA_LANE_QUEUE_SIZE', 'high=200,normal=100,low=50')
     
     ALLOWED_ROOMS = [
         "Nappali", "Sátor", "Konyha", "Fürdő", "Háló", "Terasz",
@@ -67,4 +153,23 @@ class Config:
         print(f"HTTP State Port: {cls.HTTP_STATE_PORT}")
         print(f"Vera IP: {cls.VERA_IP}")
         print(f"Vera Port: {cls.VERA_PORT}")
-        print(f"Vera Event Filter: {cls.VERA_EVENT_FILTER}")
\ No newline at end of file
+        print(f"Vera Event Filter: {cls.VERA_EVENT_FILTER}")
+        print(f"Export Buffer Size: {cls.EXPORT_BUFFER_SIZE}")
+        print(f"HTTP Buffer Size: {cls.HTTP_BUFFER_SIZE} (retry every {cls.HTTP_RETRY_INTERVAL} s, max {cls.HTTP_MAX_ATTEMPTS} attempts)")
+        print(f"Vera Watched Variables: {cls.VERA_WATCHED_VARIABLES}")
+        print(f"Vera Command Topic: {cls.VERA_CMD_TOPIC}")
+        print(f"Vera Command Ack Topic: {cls.VERA_CMD_ACK_TOPIC}")
+        print(f"Vera Command Coalesce (ms): {cls.VERA_CMD_COALESCE_MS}")
+        print(f"Vera Capture File: {cls.VERA_CAPTURE_FILE or 'disabled'}")
+        print(f"Vera Capture Max (MB): {cls.VERA_CAPTURE_MAX_MB}")
+        print(f"Log Level: {cls.LOG_LEVEL}")
+        print(f"Log Format: {cls.LOG_FORMAT}")
+        print(f"Log File: {cls.LOG_FILE or 'disabled'} ({cls.LOG_MAX_BYTES} bytes x {cls.LOG_BACKUP_COUNT})")
+        print(f"Log Rate Limits: {cls.LOG_RATE_LIMITS} per {cls.LOG_RATE_WINDOW} s")
+        print(f"Debug Topic: {cls.DEBUG_TOPIC} (reply: {cls.DEBUG_REPLY_TOPIC}, dir: {cls.DEBUG_DIR})")
+        print(f"Health Port: {cls.HEALTH_PORT}")
+        print(f"Vera Priority High: {cls.VERA_PRIORITY_HIGH}")
+        print(f"Vera Priority Low: {cls.VERA_PRIORITY_LOW}")
+        print(f"Vera Lane Workers: {cls.VERA_LANE_WORKERS}")
+        print(f"Vera Lane Latency (ms): {cls.VERA_LANE_LATENCY_MS}")
+        print(f"Vera Lane Queue Size: {cls.VERA_LANE_QUEUE_SIZE}")
\ No newline at end of file
@@ -0,0 +1,202 @@
+# debug_tools.py
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+import tracemalloc
+from collections import Counter
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THREAD_PREFIXES = ('vera-poll', 'delivery-')
+
+class DebugTools:
+    """On-demand diagnostics triggered over MQTT.
+
+    '<DEBUG_TOPIC>/profile'  sampling profile of the poll and delivery threads (payload: seconds)
+    '<DEBUG_TOPIC>/memory'   tracemalloc snapshot diff (payload: 'start', 'snapshot' or 'stop');
+                             tracing stops by itself DEBUG_PROFILE_MAX_SECONDS after the last one
+    '<DEBUG_TOPIC>/stacks'   stack dump of all live threads
+
+    Nothing runs until a trigger arrives; results go to DEBUG_DIR and a
+    summary is published on DEBUG_REPLY_TOPIC.
+    """
+
+    def __init__(self, publish):
+        self.publish = publish
+        self.output_dir = Config.DEBUG_DIR
+        self.profile_lock = threading.Lock()
+        self.memory_lock = threading.Lock()
+        self.last_snapshot = None
+        self.memory_timer = None
+
+    def handle_command(self, topic, payload_str):
+        command = topic[len(Config.DEBUG_TOPIC):].strip('/')
+        handlers = {
+            'profile': self._run_profile,
+            'memory': self._run_memory,
+            'stacks': self._run_stacks
+        }
+        handler = handlers.get(command)
+        if not handler:
+            logger.warning("Unknown debug command: %s", topic)
+            return
+        # Keep the MQTT network loop free while the diagnostic runs
+        threading.Thread(target=self._run, args=(command, handler, payload_str.strip()),
+                         name=f"debug-{command}", daemon=True).start()
+
+    def _run(self, command, handler, payload):
+        try:
+            summary = handler(payload)
+        except Exception as e:
+            logger.error("Debug %s error: %s", command, e)
+            summary = {'error': str(e)}
+        summary['command'] = command
+        self._reply(summary)
+
+    def _reply(self, summary):
+        try:
+            self.publish(Config.DEBUG_REPLY_TOPIC, json.dumps(summary, ensure_ascii=False))
+        except Exception as e:
+            logger.error("Debug reply error: %s", e)
+
+    def _write(self, prefix, lines):
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"{prefix}-{time.strftime('%Y%m%d-%H%M%S')}.txt")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        return path
+
+    def _frame_label(self, frame):
+        code = frame.f_code
+        return f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}"
+
+    def _run_profile(self, payload):
+        try:
+            duration = float(payload) if payload else 10.0
+        except ValueError:
+            duration = 10.0
+        duration = max(1.0, min(duration, Config.DEBUG_PROFILE_MAX_SECONDS))
+        interval = Config.DEBUG_SAMPLE_INTERVAL_MS / 1000.0
+
+        if not self.profile_lock.acquire(blocking=False):
+            return {'error': 'profile already running'}
+        try:
+            stacks = Counter()
+            leaves = Counter()
+            samples = 0
+            sampling_time = 0.0
+            own_id = threading.get_ident()
+            started = time.monotonic()
+            deadline = started + duration
+            while time.monotonic() < deadline:
+                sample_start = time.perf_counter()
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for thread_id, frame in sys._current_frames().items():
+                    name = names.get(thread_id, '')
+                    if thread_id == own_id or not name.startswith(DEFAULT_THREAD_PREFIXES):
+                        continue
+                    labels = []
+                    while frame is not None:
+                        labels.append(self._frame_label(frame))
+                        frame = frame.f_back
+                    labels.reverse()
+                    stacks[f"{name};" + ';'.join(labels)] += 1
+                    leaves[labels[-1]] += 1
+                    samples += 1
+                sampling_time += time.perf_counter() - sample_start
+                time.sleep(interval)
+            elapsed = time.monotonic() - started
+        finally:
+            self.profile_lock.release()
+
+        # Collapsed stack format, usable directly with flamegraph tools
+        path = self._write('profile', [f"{stack} {count}" for stack, count in stacks.most_common()])
+        top = [
+            {'frame': label, 'samples': count, 'percent': round(100.0 * count / samples, 1)}
+            for label, count in leaves.most_common(10)
+        ] if samples else []
+        logger.info("Profile written to %s (%s samples)", path, samples)
+        # Time the sampler itself held the GIL, i.e. what it cost the threads it measured
+        overhead = {
+            'intervalMs': Config.DEBUG_SAMPLE_INTERVAL_MS,
+            'samplingMs': round(sampling_time * 1000, 1),
+            'percent': round(100.0 * sampling_time / elapsed, 2) if elapsed else None
+        }
+        return {'file': path, 'seconds': duration, 'samples': samples, 'overhead': overhead, 'top': top}
+
+    def _arm_memory_timer(self):
+        # Called with memory_lock held; tracing slows every allocation, so it never stays on unattended
+        if self.memory_timer is not None:
+            self.memory_timer.cancel()
+        self.memory_timer = threading.Timer(Config.DEBUG_PROFILE_MAX_SECONDS, self._memory_timeout)
+        self.memory_timer.daemon = True
+        self.memory_timer.start()
+
+    def _stop_tracing(self):
+        # Called with memory_lock held
+        if self.memory_timer is not None:
+            self.memory_timer.cancel()
+            self.memory_timer = None
+        tracemalloc.stop()
+        self.last_snapshot = None
+
+    def _memory_timeout(self):
+        with self.memory_lock:
+            if self.memory_timer is None or not tracemalloc.is_tracing():
+                return
+            self._stop_tracing()
+        logger.info("tracemalloc stopped after %s s without a snapshot", Config.DEBUG_PROFILE_MAX_SECONDS)
+        self._reply({'command': 'memory', 'tracing': False, 'reason': 'idle timeout'})
+
+    def _run_memory(self, payload):
+        action = payload.lower() or 'snapshot'
+        with self.memory_lock:
+            if action == 'stop':
+                self._stop_tracing()
+                return {'tracing': False}
+
+            if not tracemalloc.is_tracing() or action == 'start':
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start(Config.DEBUG_TRACEMALLOC_FRAMES)
+                self.last_snapshot = tracemalloc.take_snapshot()
+                self._arm_memory_timer()
+                return {'tracing': True, 'baseline': True, 'stopsInSeconds': Config.DEBUG_PROFILE_MAX_SECONDS}
+
+            snapshot = tracemalloc.take_snapshot()
+            previous = self.last_snapshot
+            self.last_snapshot = snapshot
+            self._arm_memory_timer()
+
+        stats = snapshot.compare_to(previous, 'lineno') if previous else snapshot.statistics('lineno')
+        current, peak = tracemalloc.get_traced_memory()
+        path = self._write('memory', [str(stat) for stat in stats[:100]])
+        top = [
+            {
+                'where': str(stat.traceback[0]),
+                'sizeDiff': getattr(stat, 'size_diff', stat.size),
+                'countDiff': getattr(stat, 'count_diff', stat.count)
+            }
+            for stat in stats[:10]
+        ]
+        logger.info("Memory diff written to %s", path)
+        return {'file': path, 'tracing': True, 'stopsInSeconds': Config.DEBUG_PROFILE_MAX_SECONDS,
+                'currentBytes': current, 'peakBytes': peak, 'top': top}
+
+    def _run_stacks(self, payload):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        lines = []
+        threads = []
+        for thread_id, frame in sys._current_frames().items():
+            name = names.get(thread_id, str(thread_id))
+            lines.append(f"--- {name} ({thread_id}) ---")
+            lines.extend(line.rstrip() for line in traceback.format_stack(frame))
+            threads.append({'name': name, 'at': self._frame_label(frame)})
+        path = self._write('stacks', lines)
+        logger.info("Thread stacks written to %s", path)
+        return {'file': path, 'threads': threads}
@@ -0,0 +1,195 @@
+# delivery_lanes.py
+
+import logging
+import queue
+import re
+import threading
+import time
+from collections import deque
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+LANES = ('high', 'normal', 'low')
+
+class DeliveryLanes:
+    """Separate delivery queues per priority class, each with its own workers.
+
+    A slow send in the 'low' lane never delays a door alert in the 'high' lane.
+    Each worker owns one bounded queue shard; events are sharded by device so a
+    device's events stay in order. A full shard drops its oldest event.
+    """
+
+    def __init__(self, deliver):
+        self.deliver = deliver
+        self.rules = {
+            'high': self._parse_rules(getattr(Config, 'VERA_PRIORITY_HIGH', '')),
+            'low': self._parse_rules(getattr(Config, 'VERA_PRIORITY_LOW', ''))
+        }
+        self.workers = self._parse_lane_map(getattr(Config, 'VERA_LANE_WORKERS', ''), 1)
+        self.latency_targets = self._parse_lane_map(getattr(Config, 'VERA_LANE_LATENCY_MS', ''), 2000)
+        self.queue_sizes = self._parse_lane_map(getattr(Config, 'VERA_LANE_QUEUE_SIZE', ''), 100)
+        self.queues = {
+            lane: [queue.Queue(maxsize=self.queue_sizes[lane]) for _ in range(max(1, self.workers[lane]))]
+            for lane in LANES
+        }
+        self.stats = {
+            lane: {'sent': 0, 'missed': 0, 'dropped': 0, 'latencies': deque(maxlen=500)}
+            for lane in LANES
+        }
+        self.stats_lock = threading.Lock()
+        self.lane_cache = {}
+        self.threads = []
+        self.running = False
+
+    def _parse_rules(self, rule_config):
+        rules = []
+        for item in rule_config.split('#'):
+            if not item.strip():
+                continue
+            parts = [part.strip() for part in item.split(':')]
+            room = parts[0]
+            device = parts[1] if len(parts) > 1 else '*'
+            variable = parts[2] if len(parts) > 2 else '*'
+            try:
+                rules.append((
+                    self._compile(room),
+                    self._compile(device),
+                    self._compile(variable)
+                ))
+            except re.error as e:
+                logger.error("Priority rule error '%s': %s", item, e)
+        return rules
+
+    def _compile(self, pattern):
+        if not pattern or pattern == '*':
+            return None
+        regex_pattern = re.escape(pattern).replace(r'\*', '.*')
+        return re.compile(f"^{regex_pattern}$", re.IGNORECASE)
+
+    def _parse_lane_map(self, map_config, default):
+        result = {lane: default for lane in LANES}
+        for item in map_config.split(','):
+            if '=' not in item:
+                continue
+            lane, value = item.split('=', 1)
+            lane = lane.strip().lower()
+            if lane in result and value.strip().isdigit():
+                result[lane] = int(value.strip())
+        return result
+
+    def _rule_matches(self, rule, room, device, variable):
+        return all(
+            regex is None or regex.match(text)
+            for regex, text in zip(rule, (room, device, variable))
+        )
+
+    def resolve_lane(self, room, device, variable):
+        key = (room, device, variable)
+        lane = self.lane_cache.get(key)
+        if lane is None:
+            lane = 'normal'
+            for candidate in ('high', 'low'):
+                if any(self._rule_matches(rule, room, device, variable) for rule in self.rules[candidate]):
+                    lane = candidate
+                    break
+            self.lane_cache[key] = lane
+        return lane
+
+    def submit(self, message, lane):
+        shards = self.queues[lane]
+        shard = shards[hash((message.get('room'), message.get('device'))) % len(shards)]
+        item = (time.monotonic(), message)
+        while True:
+            try:
+                shard.put_nowait(item)
+                return
+            except queue.Full:
+                pass
+            # Drop the oldest event rather than blocking the poll loop
+            try:
+                shard.get_nowait()
+                shard.task_done()
+            except queue.Empty:
+                continue
+            with self.stats_lock:
+                self.stats[lane]['dropped'] += 1
+            logger.warning("Lane '%s' queue full, dropped oldest event", lane)
+
+    def join(self):
+        for lane in LANES:
+            for shard in self.queues[lane]:
+                shard.join()
+
+    def _worker(self, lane, index):
+        lane_queue = self.queues[lane][index]
+        target = self.latency_targets[lane] / 1000.0
+        while self.running:
+            try:
+                queued_at, message = lane_queue.get(timeout=1)
+            except queue.Empty:
+                continue
+
+            try:
+                self.deliver(message, lane)
+            except Exception as e:
+                logger.error("Delivery error (%s): %s", lane, e)
+
+            latency = time.monotonic() - queued_at
+            with self.stats_lock:
+                stats = self.stats[lane]
+                stats['sent'] += 1
+                stats['latencies'].append(latency)
+                if latency > target:
+                    stats['missed'] += 1
+            if latency > target:
+                logger.warning("Lane '%s' latency %.0f ms over target %.0f ms", lane, latency * 1000, target * 1000)
+            lane_queue.task_done()
+
+    def backlog(self):
+        return {lane: sum(shard.qsize() for shard in self.queues[lane]) for lane in LANES}
+
+    def _percentile(self, sorted_values, fraction):
+        if not sorted_values:
+            return None
+        index = min(len(sorted_values) - 1, int(len(sorted_values) * fraction))
+        return round(sorted_values[index] * 1000, 1)
+
+    def get_stats(self):
+        result = {}
+        backlog = self.backlog()
+        with self.stats_lock:
+            for lane in LANES:
+                stats = self.stats[lane]
+                latencies = sorted(stats['latencies'])
+                result[lane] = {
+                    'queued': backlog[lane],
+                    'sent': stats['sent'],
+                    'missed': stats['missed'],
+                    'dropped': stats['dropped'],
+                    'targetMs': self.latency_targets[lane],
+                    'p50Ms': self._percentile(latencies, 0.50),
+                    'p95Ms': self._percentile(latencies, 0.95),
+                    'maxMs': self._percentile(latencies, 1.0)
+                }
+        return result
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        for lane in LANES:
+            for index in range(len(self.queues[lane])):
+                thread = threading.Thread(
+                    target=self._worker, args=(lane, index),
+                    name=f"delivery-{lane}-{index}", daemon=True
+                )
+                thread.start()
+                self.threads.append(thread)
+        logger.info("Delivery lanes started: %s", self.workers)
+
+    def stop(self):
+        self.running = False
+        for thread in self.threads:
+            thread.join(timeout=2)
+        self.threads = []
@@ -0,0 +1,133 @@
+# health.py
+
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class HealthMonitor:
+    """Collects heartbeats from the bridge components and serves /live, /ready and /health.
+
+    Live:  the poll loop has beaten within HEALTH_MAX_HEARTBEAT_AGE seconds.
+    Ready: live, device topology loaded, a poll succeeded within HEALTH_MAX_POLL_AGE,
+           every MQTT client connected and the delivery backlog under HEALTH_MAX_BACKLOG.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.heartbeat = None
+        self.last_poll_ok = None
+        self.topology_loaded = False
+        self.mqtt_state = {}
+        self.backlog_source = None
+        self.server = None
+
+    def beat(self):
+        self.heartbeat = time.monotonic()
+
+    def poll_succeeded(self):
+        now = time.monotonic()
+        self.heartbeat = now
+        self.last_poll_ok = now
+
+    def set_topology_loaded(self, loaded):
+        self.topology_loaded = loaded
+
+    def set_mqtt_state(self, name, connected):
+        with self.lock:
+            self.mqtt_state[name] = connected
+
+    def set_backlog_source(self, source):
+        self.backlog_source = source
+
+    def _age(self, timestamp, now):
+        return round(now - timestamp, 1) if timestamp is not None else None
+
+    def status(self):
+        now = time.monotonic()
+        # Before the first heartbeat, count from process start so a loop that never runs still fails
+        heartbeat_age = now - (self.heartbeat if self.heartbeat is not None else self.started)
+        poll_age = self._age(self.last_poll_ok, now)
+
+        backlog = {}
+        if self.backlog_source:
+            try:
+                backlog = self.backlog_source()
+            except Exception as e:
+                logger.error("Backlog read error: %s", e)
+        with self.lock:
+            mqtt_state = dict(self.mqtt_state)
+
+        live = heartbeat_age <= Config.HEALTH_MAX_HEARTBEAT_AGE
+        reasons = []
+        if not live:
+            reasons.append('poll loop heartbeat stale')
+        if not self.topology_loaded:
+            reasons.append('device topology not loaded')
+        if poll_age is None or poll_age > Config.HEALTH_MAX_POLL_AGE:
+            reasons.append('no recent successful poll')
+        for name, connected in mqtt_state.items():
+            if not connected:
+                reasons.append(f"mqtt '{name}' disconnected")
+        if sum(backlog.values()) > Config.HEALTH_MAX_BACKLOG:
+            reasons.append('delivery backlog too large')
+
+        return {
+            'live': live,
+            'ready': not reasons,
+            'reasons': reasons,
+            'uptimeSeconds': round(now - self.started, 1),
+            'heartbeatAgeSeconds': round(heartbeat_age, 1),
+            'lastPollAgeSeconds': poll_age,
+            'topologyLoaded': self.topology_loaded,
+            'mqtt': mqtt_state,
+            'backlog': backlog
+        }
+
+    def start_server(self):
+        if self.server or not Config.HEALTH_PORT:
+            return
+        try:
+            self.server = ThreadingHTTPServer(('0.0.0.0', Config.HEALTH_PORT), HealthRequestHandler)
+            self.server.monitor = self
+            self.server.daemon_threads = True
+            threading.Thread(target=self.server.serve_forever, name="health-http", daemon=True).start()
+            logger.info("Health endpoint on port %s", Config.HEALTH_PORT)
+        except Exception as e:
+            logger.error("Health server error: %s", e)
+
+    def stop_server(self):
+        if self.server:
+            self.server.shutdown()
+            self.server = None
+
+class HealthRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        status = self.server.monitor.status()
+        path = self.path.split('?', 1)[0].rstrip('/')
+        if path == '/live':
+            ok = status['live']
+        elif path == '/ready':
+            ok = status['ready']
+        elif path in ('', '/health'):
+            ok = True
+        else:
+            self.send_error(404)
+            return
+
+        data = json.dumps(status, ensure_ascii=False).encode('utf-8')
+        self.send_response(200 if ok else 503)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+health_monitor = HealthMonitor()
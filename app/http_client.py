@@ -14,7 +14,7 @@ class HTTPClient:
             current_ip = ip_client.get_current_ip()
             url = f"http://{current_ip}:{port}"
             
-            self.logger.debug(f"Sending to {url}")
+            self.logger.debug("Sending to %s", url)
             
             headers = {
                 'Content-Type': 'application/json; charset=utf-8',
@@ -29,12 +29,12 @@ class HTTPClient:
             )
             
             if response.status_code == 200:
-                self.logger.debug(f"Data sent to {url}")
+                self.logger.debug("Data sent to %s", url)
                 return True
             else:
-                self.logger.error(f"Send error: {response.status_code}")
+                self.logger.error("Send error: %s", response.status_code)
                 return False
                 
         except Exception as e:
-            self.logger.error(f"HTTP send error: {e}")
+            self.logger.error("HTTP send error: %s", e)
             return False
\ No newline at end of file
@@ -10,7 +10,7 @@ logger = logging.getLogger(__name__)
 class IPClient:
     def __init__(self):
         self.current_ip = os.getenv('HTTP_CLIENT_IP', '192.168.1.100')
-        logger.info(f"IPClient started with IP: {self.current_ip}")
+        logger.info("IPClient started with IP: %s", self.current_ip)
     
     def update_ip_from_message(self, topic: str, payload: Any) -> bool:
         if topic != "client/con_ip":
@@ -22,7 +22,7 @@ class IPClient:
                 return False
             
             if new_ip != self.current_ip:
-                logger.info(f"IP changed: {self.current_ip} -> {new_ip}")
+                logger.info("IP changed: %s -> %s", self.current_ip, new_ip)
                 self.current_ip = new_ip
                 self._update_config()
                 return True
@@ -30,7 +30,7 @@ class IPClient:
             return False
                 
         except Exception as e:
-            logger.error(f"IP update error: {e}")
+            logger.error("IP update error: %s", e)
             return False
     
     def _extract_ip(self, payload: Any) -> str:
@@ -67,10 +67,10 @@ class IPClient:
                     f.writelines(lines)
             
             os.environ['HTTP_CLIENT_IP'] = self.current_ip
-            logger.info(f"Config updated: {self.current_ip}")
+            logger.info("Config updated: %s", self.current_ip)
             
         except Exception as e:
-            logger.error(f"Config update error: {e}")
+            logger.error("Config update error: %s", e)
     
     def get_current_ip(self) -> str:
         return self.current_ip
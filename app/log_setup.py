@@ -0,0 +1,119 @@
+# log_setup.py
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from config import Config
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line. The message is only formatted here, in the writer thread."""
+
+    def format(self, record):
+        entry = {
+            'ts': self.formatTime(record, '%Y-%m-%dT%H:%M:%S') + f".{int(record.msecs):03d}",
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'msg': record.getMessage()
+        }
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            entry['suppressed'] = suppressed
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues the record as-is instead of formatting it in the calling thread."""
+
+    def prepare(self, record):
+        return record
+
+class RateLimitFilter(logging.Filter):
+    """Per-category (logger name) limit of records per window; warnings and errors always pass.
+
+    The number of dropped records is attached to the next record that gets through.
+    """
+
+    def __init__(self, limits, window):
+        super().__init__()
+        self.default_limit = limits.get('default', 0)
+        self.limits = limits
+        self.window = window
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+
+        limit = self.limits.get(record.name, self.default_limit)
+        if limit <= 0:
+            return True
+
+        now = time.monotonic()
+        with self.lock:
+            counter = self.counters.get(record.name)
+            if counter is None or now - counter[0] >= self.window:
+                suppressed = counter[2] if counter else 0
+                self.counters[record.name] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+            if counter[1] < limit:
+                counter[1] += 1
+                return True
+            counter[2] += 1
+            return False
+
+def _parse_limits(limit_config):
+    limits = {}
+    for item in limit_config.split(','):
+        if '=' not in item:
+            continue
+        name, value = item.split('=', 1)
+        if value.strip().isdigit():
+            limits[name.strip()] = int(value.strip())
+    return limits
+
+def setup_logging():
+    """Routes all logging through a queue to a background writer thread."""
+    if Config.LOG_FORMAT == 'json':
+        formatter = JSONFormatter()
+    else:
+        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    handlers = []
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+    handlers.append(stream_handler)
+
+    if Config.LOG_FILE:
+        file_handler = logging.handlers.RotatingFileHandler(
+            Config.LOG_FILE,
+            maxBytes=Config.LOG_MAX_BYTES,
+            backupCount=Config.LOG_BACKUP_COUNT,
+            encoding='utf-8'
+        )
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+
+    log_queue = queue.Queue(-1)
+    queue_handler = LazyQueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter(_parse_limits(Config.LOG_RATE_LIMITS), Config.LOG_RATE_WINDOW))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(getattr(logging, Config.LOG_LEVEL, logging.INFO))
+
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -1,31 +1,44 @@
 import logging
+import signal
 import sys
 import os
+import threading
 
 # Add current directory to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[logging.StreamHandler(), logging.FileHandler('vera_processor.log')]
-)
+from log_setup import setup_logging
+
+setup_logging()
 
 logger = logging.getLogger(__name__)
 
 def main():
     try:
         logger.info("Starting Vera Processor")
+
+        from health import health_monitor
+        health_monitor.start_server()
         
         # Import inside function to avoid circular imports
         from mqtt_handler import MQTTHandler
         mqtt_handler = MQTTHandler()
+        # Polling and both MQTT transports start in parallel and never wait on each other
         mqtt_handler.start()
+
+        stop_event = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+        try:
+            while not stop_event.wait(1):
+                pass
+        finally:
+            mqtt_handler.stop()
+        logger.info("Stopped")
         
     except KeyboardInterrupt:
         logger.info("Stopped by user")
     except Exception as e:
-        logger.error(f"Application error: {e}")
+        logger.error("Application error: %s", e)
 
 if __name__ == "__main__":
     main()
@@ -49,7 +62,7 @@ if __name__ == "__main__":
 #     except KeyboardInterrupt:
 #         logger.info("Stopped by user")
 #     except Exception as e:
-#         logger.error(f"Application error: {e}")
+#         logger.error("Application error: %s", e)
 
 # if __name__ == "__main__":
 #     main()
\ No newline at end of file
@@ -7,6 +7,10 @@ from config import Config
 from vera_data_handler import VeraDataProcessor
 from ip_client import ip_client
 from vera_http_event_handler import VeraHTTPHandler
+from vera_command_handler import VeraCommandHandler
+from traffic_recorder import traffic_recorder
+from debug_tools import DebugTools
+from health import health_monitor
 
 class MQTTHandler:
     def __init__(self):
@@ -15,47 +19,95 @@ class MQTTHandler:
         self.username = Config.MQTT_USER
         self.password = Config.MQTT_PASSWORD
         self.http_client = HTTPClient()
-        self.vera_processor = VeraDataProcessor()
         self.vera_upnp = VeraHTTPHandler()
+        self.command_prefix = f"{Config.VERA_CMD_TOPIC}/"
+        self.debug_prefix = f"{Config.DEBUG_TOPIC}/"
+
+        # Built on first use, they are not needed to start serving events
+        self._vera_processor = None
+        self._command_handler = None
+        self._debug_tools = None
+        self._lazy_lock = threading.Lock()
         
         self.client = mqtt.Client()
         self.client.on_connect = self.on_connect
         self.client.on_message = self.on_message
+        self.client.on_disconnect = self.on_disconnect
+        health_monitor.set_mqtt_state('main', False)
         
         if self.username and self.password:
             self.client.username_pw_set(self.username, self.password)
+        self.client.reconnect_delay_set(min_delay=1, max_delay=30)
         
         self.logger = logging.getLogger(__name__)
 
+    @property
+    def vera_processor(self):
+        with self._lazy_lock:
+            if self._vera_processor is None:
+                self._vera_processor = VeraDataProcessor()
+            return self._vera_processor
+
+    @property
+    def command_handler(self):
+        with self._lazy_lock:
+            if self._command_handler is None:
+                self._command_handler = VeraCommandHandler(self.vera_upnp, self._publish)
+            return self._command_handler
+
+    @property
+    def debug_tools(self):
+        with self._lazy_lock:
+            if self._debug_tools is None:
+                self._debug_tools = DebugTools(self._publish)
+            return self._debug_tools
+
     def on_connect(self, client, userdata, flags, rc):
         if rc == 0:
-            self.logger.info(f"Connected to {self.broker}:{self.port}")
+            self.logger.info("Connected to %s:%s", self.broker, self.port)
+            health_monitor.set_mqtt_state('main', True)
             client.subscribe("client/con_ip")
             client.subscribe("read/data")
-            # Start Vera handler in the background 
-            self.vera_upnp.start()
+            client.subscribe(f"{Config.VERA_CMD_TOPIC}/#")
+            for command in ('profile', 'memory', 'stacks'):
+                client.subscribe(f"{Config.DEBUG_TOPIC}/{command}")
         else:
-            self.logger.error(f"Connection error: {rc}")
+            self.logger.error("Connection error: %s", rc)
+
+    def on_disconnect(self, client, userdata, rc):
+        health_monitor.set_mqtt_state('main', False)
+        if rc != 0:
+            self.logger.warning("Disconnected unexpectedly: %s", rc)
 
     def on_message(self, client, userdata, msg):
         try:
             payload_str = msg.payload.decode('utf-8')
+            traffic_recorder.record('mqtt', {'topic': msg.topic, 'payload': payload_str})
             
-            if msg.topic == "client/con_ip":
+            if msg.topic.startswith(self.command_prefix):
+                self.command_handler.handle_command(msg.topic, payload_str)
+            elif msg.topic.startswith(self.debug_prefix):
+                self.debug_tools.handle_command(msg.topic, payload_str)
+            elif msg.topic == "client/con_ip":
                 self._handle_ip_message(payload_str)
             elif msg.topic == "read/data" and payload_str.strip().lower() == "vera":
                 self._handle_vera_data_request()
                 
         except Exception as e:
-            self.logger.error(f"Message error: {e}")
+            self.logger.error("Message error: %s", e)
+
+    def _publish(self, topic, payload):
+        self.client.publish(topic, payload)
 
     def _handle_ip_message(self, payload_str: str):
         try:
             ip_updated = ip_client.update_ip_from_message("client/con_ip", payload_str)
             if ip_updated:
                 self.logger.info("IP updated")
+                # Events buffered for the old address go to the new one right away
+                self.vera_upnp.retry_http_pending()
         except Exception as e:
-            self.logger.error(f"IP update error: {e}")
+            self.logger.error("IP update error: %s", e)
 
     def _handle_vera_data_request(self):
         try:
@@ -71,15 +123,21 @@ class MQTTHandler:
                 self.logger.error("No Vera data received")
                 
         except Exception as e:
-            self.logger.error(f"Manual request error: {e}")
+            self.logger.error("Manual request error: %s", e)
 
     def start(self):
+        """Starts polling and the MQTT transport independently; returns without blocking."""
+        # Polling does not wait for the broker, events are buffered until a sink is up
+        self.vera_upnp.start()
         try:
-            self.client.connect(self.broker, self.port, 60)
-            self.client.loop_forever()
+            self.client.connect_async(self.broker, self.port, 60)
+            self.client.loop_start()
         except Exception as e:
-            self.logger.error(f"MQTT error: {e}")
+            self.logger.error("MQTT error: %s", e)
 
     def stop(self):
         self.vera_upnp.stop()
+        if self._command_handler is not None:
+            self._command_handler.stop()
+        self.client.loop_stop()
         self.client.disconnect()
\ No newline at end of file
@@ -0,0 +1,288 @@
+# soak_replay.py
+#
+# Replays a capture recorded with VERA_CAPTURE_FILE against VeraHTTPHandler and
+# MQTTHandler, using local stand-ins for the Vera, the MQTT broker and the HTTP
+# receiver. Captured 'client/con_ip' and debug commands are skipped, they would
+# point the replay at the real receiver or interfere with its measurements.
+#
+#   python soak_replay.py capture.jsonl.gz --speed 10 --report report.json
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+class VeraStandIn(ThreadingHTTPServer):
+    """Serves the most recently replayed lu_sdata/status response."""
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), VeraRequestHandler)
+        self.responses = {'lu_sdata': {}, 'status': {}}
+        self.actions = []
+
+class VeraRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        request_id = query.get('id', [''])[0]
+        if request_id == 'action':
+            self.server.actions.append(query)
+            body = {}
+        else:
+            body = self.server.responses.get(request_id, {})
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+class ReceiverStandIn(ThreadingHTTPServer):
+    """Plays the phone side: records every event the bridge sends over HTTP."""
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), ReceiverRequestHandler)
+        self.received = []
+        self.lock = threading.Lock()
+
+class ReceiverRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length) if length else b''
+        try:
+            message = json.loads(body.decode('utf-8')) if body else None
+        except ValueError:
+            message = None
+        with self.server.lock:
+            self.server.received.append((time.monotonic(), message))
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+class BrokerStandIn:
+    """Takes the place of paho's client: publishes are kept in memory."""
+
+    def __init__(self):
+        self.published = []
+        self.lock = threading.Lock()
+
+    def publish(self, topic, payload=None, *args, **kwargs):
+        with self.lock:
+            self.published.append((topic, payload))
+
+    def subscribe(self, *args, **kwargs):
+        pass
+
+    def connect(self, *args, **kwargs):
+        pass
+
+    def disconnect(self, *args, **kwargs):
+        pass
+
+    def loop_start(self):
+        pass
+
+    def loop_stop(self):
+        pass
+
+def _is_replayable(topic, config):
+    # client/con_ip would repoint delivery at the captured receiver and rewrite .env,
+    # debug commands would profile or stop tracemalloc under the harness
+    if topic == "client/con_ip":
+        return False
+    return not topic.startswith(f"{config.DEBUG_TOPIC}/")
+
+def _event_key(message):
+    return (message.get('room'), message.get('device'), message.get('type'), message.get('value'))
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * fraction))
+    return round(sorted_values[index] * 1000, 1)
+
+def _start_server(server):
+    thread = threading.Thread(target=server.serve_forever, name=f"standin-{server.server_port}", daemon=True)
+    thread.start()
+    return thread
+
+def replay(path, speed, max_gap, memory_interval):
+    vera = VeraStandIn()
+    receiver = ReceiverStandIn()
+    _start_server(vera)
+    _start_server(receiver)
+
+    # Config is read at import time, so point it at the stand-ins first
+    os.environ['VERA_IP'] = '127.0.0.1'
+    os.environ['VERA_PORT'] = str(vera.server_port)
+    os.environ['HTTP_CLIENT_IP'] = '127.0.0.1'
+    os.environ['HTTP_DEVICE_PORT'] = str(receiver.server_port)
+    os.environ['HTTP_STATE_PORT'] = str(receiver.server_port)
+    os.environ['VERA_CAPTURE_FILE'] = ''
+
+    from config import Config
+    from traffic_recorder import load_capture
+    from mqtt_handler import MQTTHandler
+
+    records = load_capture(path)
+    if not any(record['k'] == 'lu_sdata' for record in records):
+        raise ValueError("Capture has no lu_sdata record, device topology cannot be loaded")
+
+    tracemalloc.start()
+    broker = BrokerStandIn()
+    mqtt_handler = MQTTHandler()
+    mqtt_handler.client = broker
+    vera_handler = mqtt_handler.vera_upnp
+    vera_handler.export_handler.client = broker
+    vera_handler.export_handler.connected = True
+    # Duplicate windows run on wall time, so shrink them with the replay speed
+    vera_handler.cache_timeout /= speed
+    vera_handler.export_handler.cache_timeout /= speed
+    vera_handler.lanes.start()
+
+    recorded_events = []
+    poll_starts = []
+    memory_samples = []
+    poll_count = 0
+    mqtt_count = 0
+    mqtt_skipped = Counter()
+
+    replay_start = time.monotonic()
+    last_memory_sample = 0.0
+    virtual_time = 0.0
+    previous_t = records[0]['t']
+
+    for record in records:
+        virtual_time += min(max(record['t'] - previous_t, 0), max_gap)
+        previous_t = record['t']
+        delay = replay_start + virtual_time / speed - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+        kind = record['k']
+        data = record['d']
+        if kind == 'lu_sdata':
+            vera.responses['lu_sdata'] = data
+            vera_handler.fetch_devices()
+        elif kind == 'status':
+            vera.responses['status'] = data
+            poll_starts.append(time.monotonic())
+            vera_handler.poll_status_changes()
+            poll_count += 1
+        elif kind == 'mqtt' and not _is_replayable(data['topic'], Config):
+            mqtt_skipped[data['topic']] += 1
+        elif kind == 'mqtt':
+            message = SimpleNamespace(topic=data['topic'], payload=data['payload'].encode('utf-8'))
+            mqtt_handler.on_message(broker, None, message)
+            mqtt_count += 1
+        elif kind == 'event':
+            recorded_events.append(data)
+
+        now = time.monotonic()
+        if now - last_memory_sample >= memory_interval:
+            current, peak = tracemalloc.get_traced_memory()
+            memory_samples.append((round(now - replay_start, 2), current))
+            last_memory_sample = now
+
+    vera_handler.lanes.join()
+    elapsed = time.monotonic() - replay_start
+    current, peak = tracemalloc.get_traced_memory()
+    memory_samples.append((round(elapsed, 2), current))
+    tracemalloc.stop()
+    vera_handler.lanes.stop()
+    if mqtt_handler._command_handler is not None:
+        mqtt_handler._command_handler.stop()
+
+    # End-to-end latency: receipt at the HTTP stand-in minus the start of the poll that produced it
+    latencies = []
+    with receiver.lock:
+        received = [(received_at, message) for received_at, message in receiver.received
+                    if isinstance(message, dict) and 'type' in message]
+    poll_index = 0
+    for received_at, message in sorted(received, key=lambda item: item[0]):
+        while poll_index + 1 < len(poll_starts) and poll_starts[poll_index + 1] <= received_at:
+            poll_index += 1
+        if poll_starts and poll_starts[poll_index] <= received_at:
+            latencies.append(received_at - poll_starts[poll_index])
+    latencies.sort()
+
+    received_events = Counter(_event_key(message) for _, message in received)
+    expected_events = Counter(_event_key(message) for message in recorded_events)
+    missing = expected_events - received_events
+    unexpected = received_events - expected_events
+
+    vera.shutdown()
+    receiver.shutdown()
+
+    return {
+        'capture': path,
+        'speed': speed,
+        'records': len(records),
+        'elapsedSeconds': round(elapsed, 2),
+        'throughput': {
+            'pollsPerSecond': round(poll_count / elapsed, 2) if elapsed else None,
+            'mqttInputsPerSecond': round(mqtt_count / elapsed, 2) if elapsed else None,
+            'eventsPerSecond': round(len(received) / elapsed, 2) if elapsed else None
+        },
+        'latencyMs': {
+            'p50': _percentile(latencies, 0.50),
+            'p95': _percentile(latencies, 0.95),
+            'p99': _percentile(latencies, 0.99),
+            'max': _percentile(latencies, 1.0)
+        },
+        'lanes': vera_handler.lanes.get_stats(),
+        'memory': {
+            'startBytes': memory_samples[0][1],
+            'endBytes': memory_samples[-1][1],
+            'peakBytes': peak,
+            'growthBytes': memory_samples[-1][1] - memory_samples[0][1],
+            'samples': memory_samples
+        },
+        'events': {
+            'recorded': sum(expected_events.values()),
+            'received': sum(received_events.values()),
+            'mqttPublished': len(broker.published),
+            'mqttSkipped': dict(mqtt_skipped),
+            'veraActions': len(vera.actions),
+            'match': not missing and not unexpected,
+            'missing': [list(key) + [count] for key, count in missing.items()],
+            'unexpected': [list(key) + [count] for key, count in unexpected.items()]
+        }
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a captured Vera/MQTT session at speed")
+    parser.add_argument('capture', help="gzip JSON-lines capture written with VERA_CAPTURE_FILE")
+    parser.add_argument('--speed', type=float, default=1.0, help="replay speed factor, e.g. 1, 10, 100")
+    parser.add_argument('--max-gap', type=float, default=30.0, help="longest pause kept between records (s)")
+    parser.add_argument('--memory-interval', type=float, default=1.0, help="memory sampling interval (s)")
+    parser.add_argument('--report', help="write the JSON report to this file as well")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    report = replay(args.capture, args.speed, args.max_gap, args.memory_interval)
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    print(output)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            f.write(output)
+    return 0 if report['events']['match'] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+# traffic_recorder.py
+
+import gzip
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+class TrafficRecorder:
+    """Appends controller responses, MQTT inputs and emitted events to a gzip JSON-lines capture.
+
+    Each line is {"t": unix time, "k": kind, "d": data}. Recording is
+    off unless VERA_CAPTURE_FILE is set; soak_replay.py plays a capture back.
+    Callers only enqueue; serialization and gzip I/O run on a background writer.
+    """
+
+    def __init__(self):
+        self.path = Config.VERA_CAPTURE_FILE
+        self.max_bytes = Config.VERA_CAPTURE_MAX_MB * 1024 * 1024
+        self.enabled = bool(self.path)
+        self.queue = queue.Queue(maxsize=1000)
+        self.lock = threading.Lock()
+        self.thread = None
+        self.file = None
+        self.dropped = 0
+
+    def _start_writer(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._writer, name="capture-writer", daemon=True)
+                self.thread.start()
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Appending starts a new gzip member, which gzip readers handle transparently
+        self.file = gzip.open(self.path, 'at', encoding='utf-8')
+        logger.info("Recording traffic to %s", self.path)
+
+    def record(self, kind, data):
+        if not self.enabled:
+            return
+        if self.thread is None:
+            self._start_writer()
+        try:
+            self.queue.put_nowait((round(time.time(), 3), kind, data))
+        except queue.Full:
+            self.dropped += 1
+
+    def _writer(self):
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self.queue.get(timeout=1)
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                break
+            try:
+                if item is not None and self.enabled:
+                    timestamp, kind, data = item
+                    if self.file is None:
+                        self._open()
+                    self.file.write(json.dumps({'t': timestamp, 'k': kind, 'd': data},
+                                               ensure_ascii=False, separators=(',', ':')) + '\n')
+
+                now = time.monotonic()
+                if self.file is not None and now - last_flush >= 5:
+                    self.file.flush()
+                    last_flush = now
+                    if self.dropped:
+                        logger.warning("Capture queue full, %s records dropped", self.dropped)
+                        self.dropped = 0
+                    if os.path.getsize(self.path) >= self.max_bytes:
+                        logger.warning("Capture limit reached (%s MB), recording stopped", Config.VERA_CAPTURE_MAX_MB)
+                        self.enabled = False
+                        self._close()
+            except Exception as e:
+                logger.error("Capture error: %s", e)
+        self._close()
+
+    def _close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def close(self):
+        if self.thread is not None:
+            self.queue.put(_STOP)
+            self.thread.join(timeout=5)
+            self.thread = None
+
+def load_capture(path):
+    records = []
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning("Skipping truncated capture line")
+    except EOFError:
+        # The last member is cut short when the bridge was killed mid-write
+        logger.warning("Capture %s ends early, using %s records", path, len(records))
+    return records
+
+traffic_recorder = TrafficRecorder()
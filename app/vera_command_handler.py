@@ -0,0 +1,237 @@
+# vera_command_handler.py
+
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+SWITCH_SERVICE = "urn:upnp-org:serviceId:SwitchPower1"
+DIMMER_SERVICE = "urn:upnp-org:serviceId:Dimming1"
+GATEWAY_SERVICE = "urn:micasaverde-com:serviceId:HomeAutomationGateway1"
+DIMMER_CATEGORY = 2
+
+class VeraCommandHandler:
+    """Turns 'vera/cmd/<room>/<device>' messages into Vera actions.
+
+    The first command for a target is sent at once; further commands inside
+    the coalescing window, or while a send is still running, are collapsed so
+    only the last one is sent.
+    """
+
+    def __init__(self, device_index, publish):
+        self.vera_ip = Config.VERA_IP
+        self.vera_port = Config.VERA_PORT
+        self.device_index = device_index
+        self.publish = publish
+        self.coalesce_window = Config.VERA_CMD_COALESCE_MS / 1000.0
+
+        # Keep-alive session, kept warm between commands
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        self.session.mount('http://', adapter)
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="vera-cmd")
+
+        self.pending = {}
+        self.pending_lock = threading.Lock()
+
+    def handle_command(self, topic, payload_str):
+        parts = topic[len(Config.VERA_CMD_TOPIC):].strip('/').split('/')
+        if len(parts) != 2 or not all(parts):
+            logger.warning("Invalid command topic: %s", topic)
+            return
+
+        room, name = parts
+        if room.lower() == 'scene':
+            target = self._resolve_scene(name)
+        else:
+            target = self._resolve_device(room, name)
+        if not target:
+            self._acknowledge({'room': room, 'device': name, 'success': False, 'error': 'unknown target'})
+            return
+
+        command = self._parse_command(payload_str, target)
+        if not command:
+            self._acknowledge({'room': room, 'device': name, 'success': False, 'error': 'invalid payload'})
+            return
+
+        command['received'] = time.monotonic()
+        self._submit(target, command)
+
+    def _resolve_device(self, room, name):
+        device_info, room_name = self.device_index.lookup_device(room, name)
+        if not device_info:
+            return None
+        return {
+            'key': f"device_{device_info['id']}",
+            'id': device_info['id'],
+            'room': room_name,
+            'device': device_info['name'],
+            'category': device_info.get('category')
+        }
+
+    def _resolve_scene(self, name):
+        scene = self.device_index.lookup_scene(name)
+        if not scene:
+            return None
+        return {
+            'key': f"scene_{scene['id']}",
+            'id': scene['id'],
+            'room': 'scene',
+            'device': scene['name'],
+            'category': None
+        }
+
+    def _parse_command(self, payload_str, target):
+        payload = payload_str.strip()
+        try:
+            data = json.loads(payload)
+        except json.JSONDecodeError:
+            data = payload
+
+        if target['room'] == 'scene':
+            return {'action': 'RunScene', 'value': None}
+
+        if isinstance(data, dict):
+            if 'level' in data:
+                return self._level_command(data['level'])
+            data = data.get('state', data.get('value'))
+
+        if isinstance(data, bool):
+            return {'action': 'SetTarget', 'value': 1 if data else 0}
+
+        text = str(data).strip().lower()
+        if text in ['on', 'true']:
+            return {'action': 'SetTarget', 'value': 1}
+        if text in ['off', 'false']:
+            return {'action': 'SetTarget', 'value': 0}
+
+        try:
+            number = float(text)
+        except ValueError:
+            return None
+
+        if target['category'] == DIMMER_CATEGORY:
+            return self._level_command(number)
+        return {'action': 'SetTarget', 'value': 1 if number > 0 else 0}
+
+    def _level_command(self, level):
+        try:
+            level = int(round(float(level)))
+        except (ValueError, TypeError, OverflowError):
+            return None
+        return {'action': 'SetLoadLevelTarget', 'value': max(0, min(100, level))}
+
+    def _submit(self, target, command):
+        key = target['key']
+        with self.pending_lock:
+            entry = self.pending.get(key)
+            if entry:
+                # Inside the window: remember only the latest command
+                entry['latest'] = command
+                entry['coalesced'] += 1
+                return
+            entry = {
+                'target': target,
+                'latest': None,
+                'coalesced': 0,
+                'in_flight': 1
+            }
+            self.pending[key] = entry
+
+        self.executor.submit(self._send, entry, command, 0)
+        self._schedule_flush(key)
+
+    def _schedule_flush(self, key):
+        timer = threading.Timer(self.coalesce_window, self._flush, args=(key,))
+        timer.daemon = True
+        timer.start()
+
+    def _flush(self, key):
+        with self.pending_lock:
+            entry = self.pending.get(key)
+            if not entry:
+                return
+            if entry['in_flight']:
+                # One send per target at a time: keep the latest command until
+                # the running send ends, so the final value always goes out last
+                command = None
+            else:
+                command = entry['latest']
+                if command is None:
+                    del self.pending[key]
+                    return
+                coalesced = entry['coalesced']
+                entry['latest'] = None
+                entry['coalesced'] = 0
+                entry['in_flight'] += 1
+
+        if command is None:
+            self._schedule_flush(key)
+            return
+
+        self.executor.submit(self._send, entry, command, coalesced)
+        self._schedule_flush(key)
+
+    def _action_params(self, target, command):
+        action = command['action']
+        if action == 'RunScene':
+            return {'serviceId': GATEWAY_SERVICE, 'action': 'RunScene', 'SceneNum': target['id']}
+
+        params = {'DeviceNum': target['id'], 'action': action}
+        if action == 'SetLoadLevelTarget':
+            params['serviceId'] = DIMMER_SERVICE
+            params['newLoadlevelTarget'] = command['value']
+        else:
+            params['serviceId'] = SWITCH_SERVICE
+            params['newTargetValue'] = command['value']
+        return params
+
+    def _send(self, entry, command, coalesced):
+        target = entry['target']
+        success = False
+        error = None
+        try:
+            params = {'id': 'action', 'output_format': 'json'}
+            params.update(self._action_params(target, command))
+            url = f"http://{self.vera_ip}:{self.vera_port}/data_request"
+            response = self.session.get(url, params=params, timeout=5)
+            success = response.status_code == 200
+            if not success:
+                error = f"HTTP {response.status_code}"
+        except Exception as e:
+            error = str(e)
+            logger.error("Command error for %s/%s: %s", target['room'], target['device'], e)
+        finally:
+            with self.pending_lock:
+                entry['in_flight'] -= 1
+
+        ack = {
+            'room': target['room'],
+            'device': target['device'],
+            'action': command['action'],
+            'value': command['value'],
+            'success': success,
+            'coalesced': coalesced,
+            'latencyMs': round((time.monotonic() - command['received']) * 1000, 1)
+        }
+        if error:
+            ack['error'] = error
+        self._acknowledge(ack)
+
+    def _acknowledge(self, ack):
+        try:
+            topic = f"{Config.VERA_CMD_ACK_TOPIC}/{ack.get('room', 'unknown')}/{ack.get('device', 'unknown')}"
+            self.publish(topic, json.dumps(ack, ensure_ascii=False))
+            logger.debug("Command ack: %s", ack)
+        except Exception as e:
+            logger.error("Command ack error: %s", e)
+
+    def stop(self):
+        self.executor.shutdown(wait=False)
+        self.session.close()
@@ -5,7 +5,9 @@ import json
 import logging
 import threading
 import time
+from collections import deque
 from config import Config
+from health import health_monitor
 
 logger = logging.getLogger(__name__)
 
@@ -18,21 +20,52 @@ class VeraDataExportHandler:
         
         self.client = mqtt.Client()
         self.client.on_connect = self.on_connect
+        self.client.on_disconnect = self.on_disconnect
         
         if self.username and self.password:
             self.client.username_pw_set(self.username, self.password)
+        self.client.reconnect_delay_set(min_delay=1, max_delay=30)
         
         self.connected = False
+        self.started = False
+        self.last_connect_attempt = None
+        # Events detected before the broker is reachable, published on connect
+        self.pending = deque(maxlen=Config.EXPORT_BUFFER_SIZE)
+        self.pending_lock = threading.Lock()
         self.message_cache = {}
         self.cache_timeout = 5000
         self.cache_lock = threading.Lock()
+        health_monitor.set_mqtt_state('export', False)
 
     def on_connect(self, client, userdata, flags, rc):
         if rc == 0:
-            self.connected = True
-            logger.info(f"Vera export connected to {self.broker}:{self.port}")
+            self._flush_pending()
+            health_monitor.set_mqtt_state('export', True)
+            logger.info("Vera export connected to %s:%s", self.broker, self.port)
         else:
-            logger.error(f"Vera export connection error: {rc}")
+            logger.error("Vera export connection error: %s", rc)
+
+    def on_disconnect(self, client, userdata, rc):
+        self.connected = False
+        health_monitor.set_mqtt_state('export', False)
+        if rc != 0:
+            logger.warning("Vera export disconnected unexpectedly: %s", rc)
+
+    def _publish(self, message):
+        topic = f"vera/events/{message.get('room', 'unknown')}/{message.get('device', 'unknown')}"
+        payload = json.dumps(message, ensure_ascii=False)
+        self.client.publish(topic, payload)
+
+    def _flush_pending(self):
+        # Flip to connected under the lock so nothing lands in the buffer after the flush
+        with self.pending_lock:
+            messages = list(self.pending)
+            self.pending.clear()
+            for message in messages:
+                self._publish(message)
+            self.connected = True
+        if messages:
+            logger.info("Published %s buffered events", len(messages))
 
     def _get_cache_key(self, message):
         return f"{message.get('room')}_{message.get('device')}_{message.get('type')}"
@@ -50,39 +83,49 @@ class VeraDataExportHandler:
             self.message_cache[cache_key] = current_time
             return False
 
-    def send_event(self, message):
+    def send_event(self, message, skip_duplicate_check=False):
         try:
-            if not self.connected:
-                logger.warning("MQTT not connected, skipping export")
+            if not skip_duplicate_check and self._is_duplicate(message):
+                logger.debug("Duplicate event filtered: %s", message)
                 return False
 
-            if self._is_duplicate(message):
-                logger.debug(f"Duplicate event filtered: {message}")
-                return False
-            # set the mqtt topic
-            topic = f"vera/events/{message.get('room', 'unknown')}/{message.get('device', 'unknown')}"
-            payload = json.dumps(message, ensure_ascii=False)
-            
-            self.client.publish(topic, payload)
-            logger.debug(f"Event exported to MQTT: {message}")
+            with self.pending_lock:
+                if not self.connected:
+                    self.pending.append(message)
+                    logger.debug("MQTT not connected, buffered export: %s", message)
+                    return False
+
+            self._publish(message)
+            logger.debug("Event exported to MQTT: %s", message)
             return True
             
         except Exception as e:
-            logger.error(f"Export error: {e}")
+            logger.error("Export error: %s", e)
             return False
 
     def connect(self):
+        """Starts connecting in the background; paho keeps retrying until the broker answers."""
+        if self.started:
+            return
+        # Called again from the poll loop until it succeeds; throttle repeated failures
+        now = time.monotonic()
+        if self.last_connect_attempt is not None and now - self.last_connect_attempt < 30:
+            return
+        self.last_connect_attempt = now
         try:
-            if not self.connected:
-                self.client.connect(self.broker, self.port, 60)
-                self.client.loop_start()
+            self.client.connect_async(self.broker, self.port, 60)
+            self.client.loop_start()
+            self.started = True
         except Exception as e:
-            logger.error(f"Export connection error: {e}")
+            logger.error("Export connection error: %s", e)
 
     def disconnect(self):
         try:
             self.client.loop_stop()
             self.client.disconnect()
             self.connected = False
+            self.started = False
+            self.last_connect_attempt = None
+            health_monitor.set_mqtt_state('export', False)
         except Exception as e:
-            logger.error(f"Export disconnect error: {e}")
\ No newline at end of file
+            logger.error("Export disconnect error: %s", e)
\ No newline at end of file
@@ -10,7 +10,7 @@ class VeraDataProcessor:
     def get_vera_device_list(self):
         try:
             url = f"http://{Config.VERA_IP}:{Config.VERA_PORT}/data_request?id=lu_sdata&output_format=json"
-            logger.info(f"Fetching Vera data from: {url}")
+            logger.info("Fetching Vera data from: %s", url)
             
             response = requests.get(url, timeout=10)
             response.raise_for_status()
@@ -19,20 +19,20 @@ class VeraDataProcessor:
             processed_data = self.process_vera_data(raw_data)
             
             if processed_data:
-                logger.info(f"Processed {len(processed_data.get('devices', []))} devices")
+                logger.info("Processed %s devices", len(processed_data.get('devices', [])))
             else:
                 logger.error("Failed to process Vera data")
                 
             return processed_data
             
         except requests.exceptions.RequestException as e:
-            logger.error(f"Network error: {e}")
+            logger.error("Network error: %s", e)
             return None
         except json.JSONDecodeError as e:
-            logger.error(f"JSON decode error: {e}")
+            logger.error("JSON decode error: %s", e)
             return None
         except Exception as e:
-            logger.error(f"Unexpected error: {e}")
+            logger.error("Unexpected error: %s", e)
             return None
 
     def process_vera_data(self, raw_data):
@@ -139,9 +139,9 @@ class VeraDataProcessor:
                 }
             }
 
-            logger.info(f"Processed {len(devices)} devices")
+            logger.info("Processed %s devices", len(devices))
             return result
 
         except Exception as e:
-            logger.error(f"Error processing Vera data: {e}")
+            logger.error("Error processing Vera data: %s", e)
             return None
\ No newline at end of file
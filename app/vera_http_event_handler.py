@@ -6,10 +6,15 @@ import re
 import time
 import logging
 import threading
+from collections import deque
 from config import Config
 from http_client import HTTPClient
 from ip_client import ip_client
 from vera_data_export_handler import VeraDataExportHandler
+from delivery_lanes import DeliveryLanes, LANES
+from traffic_recorder import traffic_recorder
+from health import health_monitor
+from watched_variables import build_watch_table
 
 logger = logging.getLogger(__name__)
 
@@ -19,8 +24,20 @@ class VeraHTTPHandler:
         self.vera_port = Config.VERA_PORT
         self.http_client = HTTPClient()
         self.export_handler = VeraDataExportHandler()
+        self.lanes = DeliveryLanes(self._deliver)
+        # Events the HTTP receiver has not accepted yet, one buffer per lane as [message, attempts]
+        self.http_pending = {lane: deque() for lane in LANES}
+        self.http_dropped = {lane: 0 for lane in LANES}
+        self.http_pending_lock = threading.Lock()
+        self.http_retry_running = False
+        health_monitor.set_backlog_source(self._backlog)
         self.filter_patterns = self._parse_filter_config()
+        self.watch_table = build_watch_table()
         self.devices = {}
+        self.device_lookup = {}
+        self.watched_devices = {}
+        self.name_index = {}
+        self.scene_index = {}
         self.running = False
         self.last_states = {}
         self.event_cache = {}
@@ -31,7 +48,7 @@ class VeraHTTPHandler:
     def _parse_filter_config(self):
         try:
             filter_config = getattr(Config, 'VERA_EVENT_FILTER', '')
-            logger.info(f"Filter config: '{filter_config}'")
+            logger.info("Filter config: '%s'", filter_config)
             
             if not filter_config:
                 return []
@@ -53,10 +70,10 @@ class VeraHTTPHandler:
                         'device_pattern': None
                     })
             
-            logger.info(f"Parsed {len(patterns)} filter patterns")
+            logger.info("Parsed %s filter patterns", len(patterns))
             return patterns
         except Exception as e:
-            logger.error(f"Error parsing filter config: {e}")
+            logger.error("Error parsing filter config: %s", e)
             return []
 
     def _get_cache_key(self, device_id, variable, value):
@@ -81,36 +98,62 @@ class VeraHTTPHandler:
             response = self.session.get(url, timeout=10)
             if response.status_code == 200:
                 data = response.json()
-                return self.process_device_data(data)
+                traffic_recorder.record('lu_sdata', data)
+                loaded = self.process_device_data(data)
+                if loaded:
+                    health_monitor.set_topology_loaded(True)
+                return loaded
             else:
-                logger.error(f"HTTP error: {response.status_code}")
+                logger.error("HTTP error: %s", response.status_code)
                 return False
         except Exception as e:
-            logger.error(f"Error fetching devices: {e}")
+            logger.error("Error fetching devices: %s", e)
             return False
 
     def process_device_data(self, data):
         try:
-            self.devices = {}
+            devices = {}
             for room in data.get('rooms', []):
-                self.devices[room['id']] = {'name': room['name'], 'devices': []}
+                devices[room['id']] = {'name': room['name'], 'devices': []}
 
+            device_lookup = {}
+            watched_devices = {}
+            name_index = {}
             device_count = 0
             for device in data.get('devices', []):
                 room_id = device['room']
-                if room_id in self.devices:
-                    self.devices[room_id]['devices'].append({
+                if room_id in devices:
+                    device_info = {
                         'id': device['id'],
                         'name': device['name'],
                         'category': device.get('category')
-                    })
+                    }
+                    room_name = devices[room_id]['name']
+                    devices[room_id]['devices'].append(device_info)
+                    device_lookup[device['id']] = (device_info, room_name)
+                    # The event filter is resolved here once, not on every poll
+                    if self._matches_filter(room_name, device['name']):
+                        watched_devices[device['id']] = (device_info, room_name)
+                    name_index[(room_name.lower(), device['name'].lower())] = (device_info, room_name)
                     device_count += 1
+
+            scene_index = {}
+            for scene in data.get('scenes', []):
+                scene_index[scene['name'].lower()] = {'id': scene['id'], 'name': scene['name']}
+
+            # Swap the indexes in one step so readers never see a half-built cache
+            self.devices = devices
+            self.device_lookup = device_lookup
+            self.watched_devices = watched_devices
+            self.name_index = name_index
+            self.scene_index = scene_index
             
-            logger.info(f"Processed {len(self.devices)} rooms with {device_count} devices")
+            logger.info("Processed %s rooms with %s devices (%s watched) and %s scenes",
+                        len(devices), device_count, len(watched_devices), len(scene_index))
             return True
             
         except Exception as e:
-            logger.error(f"Device data processing error: {e}")
+            logger.error("Device data processing error: %s", e)
             return False
 
     def _matches_filter(self, room_name, device_name):
@@ -129,7 +172,7 @@ class VeraHTTPHandler:
                 if re.match(regex_pattern, device_name, re.IGNORECASE):
                     return True
             except re.error as e:
-                logger.error(f"Regex error: {e}")
+                logger.error("Regex error: %s", e)
                 
         return False
 
@@ -139,13 +182,15 @@ class VeraHTTPHandler:
             response = self.session.get(url, timeout=10)
             if response.status_code == 200:
                 data = response.json()
+                traffic_recorder.record('status', data)
                 self.process_status_data(data)
+                health_monitor.poll_succeeded()
                 return True
             else:
-                logger.error(f"Status poll error: {response.status_code}")
+                logger.error("Status poll error: %s", response.status_code)
                 return False
         except Exception as e:
-            logger.error(f"Poll error: {e}")
+            logger.error("Poll error: %s", e)
             return False
 
     def process_status_data(self, status_data):
@@ -154,130 +199,200 @@ class VeraHTTPHandler:
                 return
                 
             processed_count = 0
+            watched_devices = self.watched_devices
+            watch_table = self.watch_table
             for device in status_data['devices']:
-                if 'states' in device:
-                    for state in device['states']:
-                        if 'variable' in state and 'value' in state:
-                            device_id = device['id']
-                            variable = state['variable']
-                            value = state['value']
-                            
-                            if variable in ['Status', 'LoadLevelStatus', 'Tripped']:
-                                if self._is_duplicate_event(device_id, variable, value):
-                                    logger.debug(f"Duplicate event filtered: {device_id} {variable} {value}")
-                                    continue
-                                    
-                                message = self.create_status_message(device_id, variable, value)
-                                if message:
-                                    # Send via HTTP
-                                    self.http_client.send_data(message, Config.HTTP_DEVICE_PORT)
-                                    # Send via MQTT export
-                                    self.export_handler.send_event(message)
-                                    processed_count += 1
+                device_entry = watched_devices.get(device.get('id'))
+                if device_entry is None:
+                    continue
+                device_id = device['id']
+                device_info, room_name = device_entry
+                for state in device.get('states', ()):
+                    variable = state.get('variable')
+                    watched = watch_table.get((state.get('service'), variable))
+                    if watched is None:
+                        watched = watch_table.get((None, variable))
+                    if watched is None or 'value' not in state:
+                        continue
+                    value = state['value']
+
+                    lane = self.lanes.resolve_lane(room_name, device_info['name'], watched.name)
+                    # High priority events skip the duplicate window
+                    if lane != 'high' and self._is_duplicate_event(device_id, watched.name, value):
+                        logger.debug("Duplicate event filtered: %s %s %s", device_id, watched.name, value)
+                        continue
+
+                    message = self.create_status_message(device_entry, watched, value)
+                    if message:
+                        traffic_recorder.record('event', message)
+                        self.lanes.submit(message, lane)
+                        processed_count += 1
             
             if processed_count > 0:
-                logger.info(f"Sent {processed_count} status changes")
+                logger.info("Queued %s status changes", processed_count)
                                     
         except Exception as e:
-            logger.error(f"Status data processing error: {e}")
+            logger.error("Status data processing error: %s", e)
 
-    def create_status_message(self, device_id, variable, value):
+    def lookup_device(self, room_name, device_name):
+        return self.name_index.get((room_name.lower(), device_name.lower()), (None, ""))
+
+    def lookup_scene(self, scene_name):
+        return self.scene_index.get(scene_name.lower())
+
+    def create_status_message(self, device_entry, watched, value):
         try:
-            device_info = None
-            room_name = ""
-            
-            for room_id, room_data in self.devices.items():
-                for device in room_data['devices']:
-                    if device['id'] == device_id:
-                        device_info = device
-                        room_name = room_data['name']
-                        break
-                if device_info:
-                    break
-            
-            if not device_info:
-                logger.debug(f"Device {device_id} not found in cache")
-                return None
-                
-            if not self._matches_filter(room_name, device_info['name']):
-                return None
+            device_info, room_name = device_entry
 
-            key = f"{device_id}_{variable}"
+            key = (device_info['id'], watched.name)
             if self.last_states.get(key) == value:
                 return None
 
             self.last_states[key] = value
 
-            converted_value = self._convert_value(value, variable)
-            if converted_value is None:
+            try:
+                converted_value = watched.convert(value)
+            except (ValueError, TypeError):
+                logger.debug("Unconvertible %s value: %s", watched.name, value)
                 return None
 
             message = {
                 'room': room_name,
                 'device': device_info['name'],
-                'type': variable,
+                'type': watched.name,
                 'value': converted_value
             }
             
-            logger.info(f"Status change: {message}")
+            logger.info("Status change: %s", message)
             return message
             
         except Exception as e:
-            logger.error(f"Message creation error: {e}")
+            logger.error("Message creation error: %s", e)
             return None
 
-    def _convert_value(self, value, var_type):
+    def _deliver(self, message, lane):
+        # MQTT publish is non-blocking, so it goes out before the HTTP send
+        self.export_handler.send_event(message, skip_duplicate_check=(lane == 'high'))
+
+        if lane != 'high':
+            with self.http_pending_lock:
+                if self.http_pending[lane]:
+                    # Queue behind earlier undelivered events of the lane to keep their order
+                    self._buffer_http(message, lane, 0)
+                    return
+        # High-lane events always try a direct send, they never wait behind the buffer
+        if not self.http_client.send_data(message, Config.HTTP_DEVICE_PORT):
+            with self.http_pending_lock:
+                self._buffer_http(message, lane, 1)
+        elif self._http_pending_count():
+            # The receiver answers again, no need to wait for the retry interval
+            self.retry_http_pending()
+
+    def _buffer_http(self, message, lane, attempts):
+        # Called with http_pending_lock held
+        pending = self.http_pending[lane]
+        if len(pending) >= Config.HTTP_BUFFER_SIZE:
+            pending.popleft()
+            self.http_dropped[lane] += 1
+            logger.warning("HTTP buffer for lane '%s' full, dropped oldest event", lane)
+        pending.append([message, attempts])
+
+    def _http_pending_count(self):
+        return sum(len(pending) for pending in self.http_pending.values())
+
+    def retry_http_pending(self):
+        """Resends buffered HTTP events on a background thread; one retry runs at a time."""
+        with self.http_pending_lock:
+            if not self._http_pending_count() or self.http_retry_running:
+                return
+            self.http_retry_running = True
+        threading.Thread(target=self._drain_http_pending, name="http-retry", daemon=True).start()
+
+    def _drain_http_pending(self):
+        sent = 0
         try:
-            if isinstance(value, bool):
-                return 1 if value else 0
-            
-            if isinstance(value, str):
-                value = value.strip().lower()
-                if value in ['true', 'on', '1']:
-                    return 1
-                elif value in ['false', 'off', '0']:
-                    return 0
-            
-            if var_type == "LoadLevelStatus":
-                return float(value) if value != "" else 0
-            elif var_type == "Status":
-                return 1 if float(value) > 0 else 0
-            elif var_type == "Tripped":
-                return 1 if str(value).lower() in ['true', 'on', '1'] else 0
-            
-            return float(value) if value != "" else 0
-            
-        except (ValueError, TypeError):
-            return None
+            # High lane first; stop at the first failure, the receiver is likely still away
+            for lane in LANES:
+                pending = self.http_pending[lane]
+                while True:
+                    with self.http_pending_lock:
+                        if not pending:
+                            break
+                        entry = pending[0]
+                    delivered = self.http_client.send_data(entry[0], Config.HTTP_DEVICE_PORT)
+                    with self.http_pending_lock:
+                        # The buffer may have dropped it meanwhile if it overflowed
+                        is_head = bool(pending) and pending[0] is entry
+                        if delivered:
+                            if is_head:
+                                pending.popleft()
+                            sent += 1
+                            continue
+                        entry[1] += 1
+                        if entry[1] >= Config.HTTP_MAX_ATTEMPTS and is_head:
+                            # Do not let one rejected event block the lane forever
+                            pending.popleft()
+                            self.http_dropped[lane] += 1
+                            logger.warning("HTTP event dropped after %s attempts (lane '%s'): %s",
+                                           entry[1], lane, entry[0])
+                            continue
+                    return
+        finally:
+            with self.http_pending_lock:
+                self.http_retry_running = False
+                remaining = self._http_pending_count()
+            if sent:
+                logger.info("Resent %s buffered HTTP events, %s still pending", sent, remaining)
 
-    def event_loop(self):
-        success = self.fetch_devices()
-        if not success:
-            logger.error("Failed to fetch device data")
-            return
+    def _backlog(self):
+        backlog = self.lanes.backlog()
+        backlog['httpPending'] = self._http_pending_count()
+        return backlog
 
-        # Connect MQTT export handler
-        self.export_handler.connect()
+    def event_loop(self):
+        # Keep retrying instead of returning, so a slow controller shows up as
+        # "not ready" on the health endpoint rather than a silently dead thread
+        retry_delay = 1
+        while self.running and not self.fetch_devices():
+            logger.error("Failed to fetch device data, retrying in %s s", retry_delay)
+            health_monitor.beat()
+            self.export_handler.connect()
+            time.sleep(retry_delay)
+            retry_delay = min(retry_delay * 2, 5)
 
         logger.info("Starting status polling")
+        last_stats_log = time.monotonic()
+        last_http_retry = time.monotonic()
         while self.running:
+            health_monitor.beat()
             try:
                 self.poll_status_changes()
+                self.export_handler.connect()
+                if self._http_pending_count() and time.monotonic() - last_http_retry >= Config.HTTP_RETRY_INTERVAL:
+                    self.retry_http_pending()
+                    last_http_retry = time.monotonic()
+                if time.monotonic() - last_stats_log >= 300:
+                    logger.info("Lane stats: %s, HTTP dropped: %s", self.lanes.get_stats(), self.http_dropped)
+                    last_stats_log = time.monotonic()
                 time.sleep(2)
             except Exception as e:
-                logger.error(f"Polling error: {e}")
+                logger.error("Polling error: %s", e)
                 time.sleep(5)
 
     def start(self):
         if not self.running:
             self.running = True
-            import threading
-            self.thread = threading.Thread(target=self.event_loop, daemon=True)
+            # Export transport, delivery lanes and polling start side by side
+            self.export_handler.connect()
+            self.lanes.start()
+            self.thread = threading.Thread(target=self.event_loop, name="vera-poll", daemon=True)
             self.thread.start()
             logger.info("Vera handler started")
 
     def stop(self):
         if self.running:
             self.running = False
+            self.lanes.stop()
             self.export_handler.disconnect()
+            traffic_recorder.close()
             logger.info("Vera handler stopped")
\ No newline at end of file
@@ -0,0 +1,110 @@
+# watched_variables.py
+
+import logging
+from collections import namedtuple
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+WatchedVariable = namedtuple('WatchedVariable', ['name', 'service', 'variable', 'output_type', 'convert'])
+
+TRUE_VALUES = frozenset(['1', 'true', 'on', 'yes'])
+FALSE_VALUES = frozenset(['0', 'false', 'off', 'no', ''])
+
+def _to_flag(value):
+    if isinstance(value, bool):
+        return 1 if value else 0
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return 1
+    if text in FALSE_VALUES:
+        return 0
+    return 1 if float(text) > 0 else 0
+
+def _to_float(value):
+    # An empty value means the sensor has not reported yet; raising drops the event
+    if isinstance(value, bool):
+        return 1.0 if value else 0.0
+    return float(str(value).strip())
+
+def _to_level(value):
+    # Same value types as before the registry: int 0/1 for on/off and empty, float otherwise
+    if isinstance(value, bool):
+        return 1 if value else 0
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if text in ('1', 'true', 'on'):
+            return 1
+        if text in ('0', 'false', 'off', ''):
+            return 0
+    return float(value)
+
+def _to_int(value):
+    return int(round(_to_float(value)))
+
+CONVERTERS = {
+    'flag': _to_flag,
+    'level': _to_level,
+    'float': _to_float,
+    'int': _to_int
+}
+
+# Built-ins that matched by variable name alone before the registry existed.
+# They keep matching under any service (e.g. VSwitch1 or door lock 'Status').
+LEGACY_VARIABLES = frozenset(['Status', 'LoadLevelStatus', 'Tripped'])
+
+# name: (service, variable, output type)
+BUILTIN_VARIABLES = {
+    'Status': ('urn:upnp-org:serviceId:SwitchPower1', 'Status', 'flag'),
+    'LoadLevelStatus': ('urn:upnp-org:serviceId:Dimming1', 'LoadLevelStatus', 'level'),
+    'Tripped': ('urn:micasaverde-com:serviceId:SecuritySensor1', 'Tripped', 'flag'),
+    'Armed': ('urn:micasaverde-com:serviceId:SecuritySensor1', 'Armed', 'flag'),
+    'Temperature': ('urn:upnp-org:serviceId:TemperatureSensor1', 'CurrentTemperature', 'float'),
+    'Humidity': ('urn:micasaverde-com:serviceId:HumiditySensor1', 'CurrentLevel', 'float'),
+    'BatteryLevel': ('urn:micasaverde-com:serviceId:HaDevice1', 'BatteryLevel', 'int'),
+    'Watts': ('urn:micasaverde-com:serviceId:EnergyMetering1', 'Watts', 'float'),
+    'KWH': ('urn:micasaverde-com:serviceId:EnergyMetering1', 'KWH', 'float')
+}
+
+def build_watch_table(watch_config=None):
+    """Builds the (service, variable) -> WatchedVariable dispatch table.
+
+    Items are separated by '#'. An item is either a built-in name or a custom
+    entry 'Name=serviceId|Variable|type', where type is flag, level, float or int.
+    Legacy built-ins are also keyed as (None, variable), the any-service fallback.
+    """
+    if watch_config is None:
+        watch_config = getattr(Config, 'VERA_WATCHED_VARIABLES', '')
+
+    table = {}
+    for item in watch_config.split('#'):
+        item = item.strip()
+        if not item:
+            continue
+
+        if '=' in item:
+            name, definition = item.split('=', 1)
+            parts = [part.strip() for part in definition.split('|')]
+            if len(parts) != 3:
+                logger.error("Invalid watched variable '%s'", item)
+                continue
+            service, variable, output_type = parts
+        elif item in BUILTIN_VARIABLES:
+            name = item
+            service, variable, output_type = BUILTIN_VARIABLES[item]
+        else:
+            logger.error("Unknown watched variable '%s'", item)
+            continue
+
+        convert = CONVERTERS.get(output_type)
+        if convert is None:
+            logger.error("Unknown output type '%s' for '%s'", output_type, item)
+            continue
+
+        entry = WatchedVariable(name.strip(), service, variable, output_type, convert)
+        table[(service, variable)] = entry
+        if '=' not in item and name in LEGACY_VARIABLES:
+            table[(None, variable)] = entry
+
+    logger.info("Watching variables: %s", sorted(set(entry.name for entry in table.values())))
+    return table
@@ -16,21 +16,20 @@ echo "Log: $LOG_FILE"
 echo "---------------------------------------------------------"
 
 CHECK_CONTAINERS="mios2http"
+HEALTH_PORT="${HEALTH_PORT:-8099}"
 
 check_and_recover_container() {
     local container=$1
-    local timeout=20
     
     echo "Checking state of $container..."
     container_status=$(docker inspect -f '{{.State.Status}}' "$container" 2>/dev/null)
+    health_status=$(docker inspect -f '{{if .State.Health}}{{.State.Health.Status}}{{end}}' "$container" 2>/dev/null)
     
-    if [[ "$container_status" != "running" ]]; then
-        echo "Warning: $container is not running ($container_status). Attempting recovery..."
+    if [[ "$container_status" != "running" || "$health_status" == "unhealthy" ]]; then
+        echo "Warning: $container is not healthy ($container_status/$health_status). Attempting recovery..."
         docker compose down "$container" && docker compose up -d "$container"
-        sleep $timeout
-        
-        container_status=$(docker inspect -f '{{.State.Status}}' "$container" 2>/dev/null)
-        [[ "$container_status" != "running" ]] && { echo "Recovery failed"; return 1; }
+        # Liveness is reported within seconds, no fixed sleep needed
+        check_container_ready "$container" || { echo "Recovery failed"; return 1; }
     fi
     
     echo "$container is running normally"
@@ -44,10 +43,14 @@ check_container_ready() {
 
     for ((i=0; i<timeout; i++)); do
         container_status=$(docker inspect -f '{{.State.Status}}' "$container" 2>/dev/null)
-        health_status=$(docker inspect -f '{{.State.Health.Status}}' "$container" 2>/dev/null)
+        health_status=$(docker inspect -f '{{if .State.Health}}{{.State.Health.Status}}{{end}}' "$container" 2>/dev/null)
         
         if [[ "$container_status" == "running" && ("$health_status" == "healthy" || -z "$health_status") ]]; then
-            echo "$container is ready"
+            echo "$container is live"
+            # Readiness (topology, recent poll, MQTT, backlog) is informational here
+            if [[ "$HEALTH_PORT" != "0" ]]; then
+                docker exec "$container" curl -s "http://127.0.0.1:$HEALTH_PORT/ready" 2>/dev/null && echo
+            fi
             return 0
         fi
         sleep 1
@@ -70,7 +73,6 @@ set_iptables_rules() {
 for container in $CHECK_CONTAINERS; do  #  no quotes to enable word splitting
     check_and_recover_container "$container" || exit 1
     check_container_ready "$container" || exit 1
-    sleep 2
     set_iptables_rules "$container" || exit 1
     echo "$container started"
 done